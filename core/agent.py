@@ -2,14 +2,38 @@ from __future__ import annotations
 
 import json
 import logging
+import os
 import re
 import time
-from typing import Any, Dict, Generator, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Generator, List, Optional, Tuple
 
 from observability.timing import Timer
 
+try:
+    import orjson
+
+    def _loads(s: str) -> Any:
+        return orjson.loads(s)
+
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
 logger = logging.getLogger(__name__)
 
+# Runs the network-bound vector search concurrently with the inline history
+# tail load at the start of a turn. Sized for request concurrency, not for a
+# single turn: queries run on worker threads and a cold embed can hold a slot
+# for its full timeout, so a tiny pool would serialize unrelated turns. The
+# floor matters on small containers — the tasks are I/O-bound, not CPU-bound.
+_IO_POOL = ThreadPoolExecutor(max_workers=max(8, (os.cpu_count() or 1) * 2),
+                              thread_name_prefix="agent-io")
+
 _SYSTEM_PROMPT_TEMPLATE = """
 You are a compact tool-using agent.
 
@@ -70,29 +94,77 @@ CRITICAL RULES:
 """.strip()
 
 
+# The formatted prompt only changes when the skills block does (e.g. after
+# skill_creator registers a new skill), so memoize on that string instead of
+# re-formatting the multi-KB template every turn.
+_PROMPT_CACHE: Dict[str, str] = {}
+
+
 def _build_system_prompt(skill_registry=None) -> str:
     skills_block = ""
     if skill_registry:
         desc = skill_registry.describe_for_prompt()
         if desc:
             skills_block = f"\nYou also have skills (call them like tools):\n{desc}\n"
-    return _SYSTEM_PROMPT_TEMPLATE.format(skills_block=skills_block)
+    prompt = _PROMPT_CACHE.get(skills_block)
+    if prompt is None:
+        if len(_PROMPT_CACHE) > 8:
+            _PROMPT_CACHE.clear()
+        prompt = _SYSTEM_PROMPT_TEMPLATE.format(skills_block=skills_block)
+        _PROMPT_CACHE[skills_block] = prompt
+    return prompt
+
+
+def _extract_json_object(text: str) -> Optional[str]:
+    """Return the first balanced {...} block in text, or None.
+
+    Single linear scan tracking brace depth and string-literal state, so a
+    '}' inside a quoted value doesn't close the object. Replaces the old
+    greedy regex, which backtracked over the whole tail and grabbed from
+    the first '{' to the *last* '}' — wrong whenever prose after the JSON
+    contained a stray brace.
+    """
+    start = -1
+    depth = 0
+    in_string = False
+    escaped = False
+    for i, ch in enumerate(text):
+        if start < 0:
+            if ch == "{":
+                start = i
+                depth = 1
+            continue
+        if escaped:
+            escaped = False
+        elif ch == "\\":
+            escaped = in_string
+        elif ch == '"':
+            in_string = not in_string
+        elif not in_string:
+            if ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    return text[start:i + 1]
+    return None
 
 
 def _parse_json_safely(text: str) -> Dict[str, Any]:
     text = (text or "").strip()
     if text.startswith("{") and text.endswith("}"):
-        data = json.loads(text)
+        # Common case with "format": "json" — parse directly, no scan.
+        data = _loads(text)
     else:
-        m = re.search(r"\{.*\}", text, flags=re.S)
-        if not m:
+        block = _extract_json_object(text)
+        if block is None:
             raise ValueError(f"Model did not return JSON. Got: {text[:300]}")
-        data = json.loads(m.group(0))
+        data = _loads(block)
     # Unwrap if model echoed the old history storage format
     if isinstance(data, dict) and "raw_model_json" in data and len(data) == 1:
         inner = data["raw_model_json"]
         if isinstance(inner, str):
-            data = json.loads(inner)
+            data = _loads(inner)
     return data
 
 
@@ -124,6 +196,31 @@ def _normalize_tool_call(data: Dict[str, Any], tools: Dict[str, Any]) -> Dict[st
     return data
 
 
+# Tool-only intents that don't need an LLM to recognize: dispatching these
+# directly skips the entire chat round-trip, by far the dominant per-turn cost.
+_ROUTE_PATTERNS = [
+    ("vector_add", re.compile(r"^(?:please\s+)?remember(?:\s+that)?\s+(.+?)\s*$", re.I | re.S)),
+    ("vector_search", re.compile(r"^what\s+do\s+you\s+know\s+about\s+(.+?)\s*[?.!]*\s*$", re.I | re.S)),
+    ("vector_search", re.compile(r"^what\s+did\s+i\s+(?:say|tell\s+you)\s+about\s+(.+?)\s*[?.!]*\s*$", re.I | re.S)),
+    ("vector_search", re.compile(r"^search\s+(?:your\s+)?memor(?:y|ies)\s+for\s+(.+?)\s*[?.!]*\s*$", re.I | re.S)),
+]
+
+
+def _route_intent(query: str) -> Optional[Tuple[str, str]]:
+    """Match a query against the tool-only patterns.
+
+    Returns (tool_name, argument) or None when the query needs the LLM.
+    """
+    q = (query or "").strip()
+    for tool, pattern in _ROUTE_PATTERNS:
+        m = pattern.match(q)
+        if m:
+            arg = m.group(1).strip()
+            if arg:
+                return tool, arg
+    return None
+
+
 def _format_memory_hits(hits: List[Dict[str, Any]]) -> str:
     if not hits:
         return "Relevant memories: (none)"
@@ -138,7 +235,8 @@ def _format_memory_hits(hits: List[Dict[str, Any]]) -> str:
 
 class AgentService:
     def __init__(self, history_store, vector_store, chat_client, tool_registry,
-                 skill_registry=None, context_tail: int = 30, memory_hits: int = 5):
+                 skill_registry=None, context_tail: int = 30, memory_hits: int = 5,
+                 semantic_cache=None, intent_router: bool = True):
         self.history_store = history_store
         self.vector_store = vector_store
         self.chat_client = chat_client
@@ -146,6 +244,75 @@ class AgentService:
         self.skill_registry = skill_registry
         self.context_tail = context_tail
         self.memory_hits = memory_hits
+        self.semantic_cache = semantic_cache
+        self.intent_router = intent_router
+
+    def _try_route_intent(self, query: str, sid: int, timer: Timer, timings: Dict[str, float],
+                          debug_lines: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """Handle tool-only intents without calling the LLM.
+
+        Returns a complete result dict when the query was routed, else None
+        (including on tool failure, so the normal agent loop can recover).
+        """
+        if not self.intent_router:
+            return None
+        route = _route_intent(query)
+        if route is None:
+            return None
+        tool, arg = route
+        t0 = time.perf_counter()
+        try:
+            if tool == "vector_add":
+                result = self.vector_store.add_text(arg, {"session_id": sid})
+                memories: List[Dict[str, Any]] = []
+                if result.get("skipped"):
+                    answer = "I already have that stored."
+                else:
+                    answer = "Noted — I'll remember that."
+            else:
+                memories = self.vector_store.search_text(arg, k=self.memory_hits)
+                answer = _format_memory_hits(memories)
+        except Exception as e:
+            logger.error("Intent route %s failed, falling back to agent loop: %s", tool, e)
+            return None
+        timings["routed_tool_s"] = time.perf_counter() - t0
+        if debug_lines is not None:
+            debug_lines.append(f"[router] tool_only: {tool}({arg[:100]})")
+        self.history_store.add_message(sid, "assistant", answer)
+        timings.update(timer.as_dict())
+        return {
+            "session_id": sid,
+            "answer": answer,
+            "meta": {
+                "timings": timings,
+                "step_count": 0,
+                "routed": "tool_only",
+                "model": self.chat_client.model,
+            },
+            "memories": memories,
+            "debug_log": "\n".join(debug_lines or []),
+        }
+
+    def _check_semantic_cache(self, query: str, timings: Dict[str, float],
+                              debug_lines: Optional[List[str]] = None):
+        """Embed the query and look it up in the semantic answer cache.
+
+        Returns (query_embedding, cached_answer). Both are None when the cache
+        is disabled or the embed fails; the embedding is reused downstream for
+        vector search so the query is only embedded once per turn.
+        """
+        if self.semantic_cache is None:
+            return None, None
+        try:
+            query_emb, emb_s = self.vector_store.embed_text(query)
+        except Exception as e:
+            logger.error("Semantic cache embed failed: %s", e)
+            return None, None
+        timings["semantic_cache_embed_s"] = emb_s
+        answer = self.semantic_cache.lookup(query_emb)
+        if debug_lines is not None:
+            debug_lines.append(f"[cache] semantic cache {'HIT' if answer is not None else 'miss'} (size={len(self.semantic_cache)})")
+        return query_emb, answer
 
     def run(self, query: str, session_id: Optional[int] = None, remember: bool = True,
             max_steps: int = 10, telegram_chat_id: Optional[int] = None) -> dict[str, Any]:
@@ -157,8 +324,35 @@ class AgentService:
         self.history_store.add_message(sid, "user", query)
         timer.mark("sqlite_add_user_s")
 
+        routed = self._try_route_intent(query, sid, timer, timings, debug_lines)
+        if routed is not None:
+            return routed
+
+        query_emb, cached_answer = self._check_semantic_cache(query, timings, debug_lines)
+        if cached_answer is not None:
+            self.history_store.add_message(sid, "assistant", cached_answer)
+            timings.update(timer.as_dict())
+            return {
+                "session_id": sid,
+                "answer": cached_answer,
+                "meta": {
+                    "timings": timings,
+                    "step_count": 0,
+                    "semantic_cache_hit": True,
+                    "model": self.chat_client.model,
+                },
+                "memories": [],
+                "debug_log": "\n".join(debug_lines),
+            }
+
+        search_future = _IO_POOL.submit(
+            self.vector_store.search_with_timings, query, self.memory_hits, query_emb)
+        # The tail load is a cheap local sqlite read — do it inline while the
+        # search is in flight instead of taking a second pool slot per turn.
+        tail = self.history_store.load_tail(sid, self.context_tail)
+        timer.mark("sqlite_load_tail_s")
         try:
-            memories, vtimings = self.vector_store.search_with_timings(query, k=self.memory_hits)
+            memories, vtimings = search_future.result()
         except Exception as e:
             logger.error("Vector search failed: %s", e)
             memories, vtimings = [], {}
@@ -171,9 +365,6 @@ class AgentService:
         for i, hit in enumerate(memories):
             debug_lines.append(f"[memory]   #{i+1} dist={hit.get('distance', '?'):.4f} text={str(hit.get('text', ''))[:120]}")
 
-        tail = self.history_store.load_tail(sid, limit=self.context_tail)
-        timer.mark("sqlite_load_tail_s")
-
         system_prompt = _build_system_prompt(self.skill_registry)
 
         context_parts = [_format_memory_hits(memories)]
@@ -214,8 +405,19 @@ class AgentService:
         debug_lines.append(f"[init] tools={list(tools.keys())}")
         debug_lines.append(f"[init] skills={skill_names}")
 
+        # Buffer history rows within the turn and flush them as one
+        # transaction before each LLM call (bounding crash loss) and before
+        # returning, instead of paying an fsync per message.
+        pending_rows: List[tuple] = []
+
+        def flush_history() -> None:
+            if pending_rows:
+                self.history_store.add_messages_bulk(sid, pending_rows)
+                pending_rows.clear()
+
         for step in range(1, max_steps + 1):
             debug_lines.append(f"[agent] step={step}")
+            flush_history()
             raw, llm_s = self.chat_client.complete_json(messages)
             timings.setdefault("llm_chat_s_total", 0.0)
             timings["llm_chat_s_total"] += llm_s
@@ -232,7 +434,11 @@ class AgentService:
             if data.get("type") == "final":
                 raw_answer = data.get("answer", "")
                 answer = raw_answer if isinstance(raw_answer, str) else json.dumps(raw_answer, ensure_ascii=False, indent=2)
-                self.history_store.add_message(sid, "assistant", answer)
+                pending_rows.append(("assistant", answer))
+                flush_history()
+
+                if self.semantic_cache is not None and query_emb is not None and answer.strip():
+                    self.semantic_cache.insert(query_emb, answer)
 
                 if remember and answer.strip():
                     pass
@@ -256,7 +462,8 @@ class AgentService:
                 answer = data.get("answer") or data.get("text") or data.get("result") or ""
                 if not answer or not isinstance(answer, str):
                     answer = "I had trouble processing that request. Please try rephrasing."
-                self.history_store.add_message(sid, "assistant", answer)
+                pending_rows.append(("assistant", answer))
+                flush_history()
                 timings.update(timer.as_dict())
                 return {
                     "session_id": sid,
@@ -275,7 +482,7 @@ class AgentService:
             args = data.get("args", {}) or {}
             is_skill = tool in skill_names
             kind = "skill" if is_skill else "tool"
-            debug_lines.append(f"[{kind}] >>> CALL {tool}({json.dumps(args, ensure_ascii=False)[:200]}) reason={data.get('why', '-')}")
+            debug_lines.append(f"[{kind}] >>> CALL {tool}({_dumps(args)[:200]}) reason={data.get('why', '-')}")
 
             if tool not in tools:
                 tool_result = {"error": f"Unknown tool/skill: {tool}", "available": list(tools.keys())}
@@ -305,13 +512,18 @@ class AgentService:
                     for i, h in enumerate(hits):
                         debug_lines.append(f"[memory]   #{i+1} dist={h.get('distance', '?'):.4f} text={str(h.get('text', ''))[:120]}")
 
-            self.history_store.add_message(sid, "tool", tool_result)
-            messages.append({"role": "assistant", "content": json.dumps(data, ensure_ascii=False)})
-            messages.append({"role": "tool", "content": json.dumps(tool_result, ensure_ascii=False)})
+            # Serialize the tool result once: the same JSON string feeds the
+            # LLM message and the history row. The assistant echo reuses the
+            # model's own raw output instead of re-encoding the parsed dict.
+            tool_result_json = _dumps(tool_result)
+            pending_rows.append(("tool", None, tool_result_json))
+            messages.append({"role": "assistant", "content": raw})
+            messages.append({"role": "tool", "content": tool_result_json})
             messages.append({"role": "user", "content": "Continue using the tool result."})
 
         answer = "I could not finish within max_steps. Please refine the goal or increase max_steps."
-        self.history_store.add_message(sid, "assistant", answer)
+        pending_rows.append(("assistant", answer))
+        flush_history()
         timings.update(timer.as_dict())
         return {
             "session_id": sid,
@@ -350,14 +562,38 @@ class AgentService:
         self.history_store.add_message(sid, "user", query)
         timer.mark("sqlite_add_user_s")
 
+        routed = self._try_route_intent(query, sid, timer, timings)
+        if routed is not None:
+            yield {
+                "event": "final",
+                "session_id": sid,
+                "answer": routed["answer"],
+                "meta": routed["meta"],
+            }
+            return
+
+        query_emb, cached_answer = self._check_semantic_cache(query, timings)
+        if cached_answer is not None:
+            self.history_store.add_message(sid, "assistant", cached_answer)
+            timings.update(timer.as_dict())
+            yield {
+                "event": "final",
+                "session_id": sid,
+                "answer": cached_answer,
+                "meta": {"timings": timings, "step_count": 0, "semantic_cache_hit": True, "model": self.chat_client.model},
+            }
+            return
+
+        search_future = _IO_POOL.submit(
+            self.vector_store.search_with_timings, query, self.memory_hits, query_emb)
+        tail = self.history_store.load_tail(sid, self.context_tail)
         try:
-            memories, vtimings = self.vector_store.search_with_timings(query, k=self.memory_hits)
+            memories, vtimings = search_future.result()
         except Exception as e:
             logger.error("Vector search failed: %s", e)
             memories, vtimings = [], {}
         timings["vector_search_total_s"] = vtimings.get("vector_search_total_s", 0.0)
 
-        tail = self.history_store.load_tail(sid, limit=self.context_tail)
         system_prompt = _build_system_prompt(self.skill_registry)
 
         context_parts = [_format_memory_hits(memories)]
@@ -393,9 +629,17 @@ class AgentService:
                 tools[skill_name] = lambda _s=skill, **kw: _s.execute(**kw)
                 skill_names.append(skill_name)
 
+        pending_rows: List[tuple] = []
+
+        def flush_history() -> None:
+            if pending_rows:
+                self.history_store.add_messages_bulk(sid, pending_rows)
+                pending_rows.clear()
+
         for step in range(1, max_steps + 1):
             yield {"event": "thinking", "step": step}
 
+            flush_history()
             raw, llm_s = self.chat_client.complete_json(messages)
             timings.setdefault("llm_chat_s_total", 0.0)
             timings["llm_chat_s_total"] += llm_s
@@ -412,7 +656,10 @@ class AgentService:
             if data.get("type") == "final":
                 raw_answer = data.get("answer", "")
                 answer = raw_answer if isinstance(raw_answer, str) else json.dumps(raw_answer, ensure_ascii=False, indent=2)
-                self.history_store.add_message(sid, "assistant", answer)
+                pending_rows.append(("assistant", answer))
+                flush_history()
+                if self.semantic_cache is not None and query_emb is not None and answer.strip():
+                    self.semantic_cache.insert(query_emb, answer)
                 timings.update(timer.as_dict())
                 yield {
                     "event": "final",
@@ -426,7 +673,8 @@ class AgentService:
                 answer = data.get("answer") or data.get("text") or data.get("result") or ""
                 if not answer or not isinstance(answer, str):
                     answer = "I had trouble processing that request. Please try rephrasing."
-                self.history_store.add_message(sid, "assistant", answer)
+                pending_rows.append(("assistant", answer))
+                flush_history()
                 timings.update(timer.as_dict())
                 yield {
                     "event": "final",
@@ -456,13 +704,18 @@ class AgentService:
             result_preview = str(tool_result)[:300]
             yield {"event": "tool_result", "step": step, "tool": tool_name, "result": result_preview, "elapsed_s": round(elapsed if tool_name in tools else 0, 3)}
 
-            self.history_store.add_message(sid, "tool", tool_result)
-            messages.append({"role": "assistant", "content": json.dumps(data, ensure_ascii=False)})
-            messages.append({"role": "tool", "content": json.dumps(tool_result, ensure_ascii=False)})
+            # Serialize the tool result once: the same JSON string feeds the
+            # LLM message and the history row. The assistant echo reuses the
+            # model's own raw output instead of re-encoding the parsed dict.
+            tool_result_json = _dumps(tool_result)
+            pending_rows.append(("tool", None, tool_result_json))
+            messages.append({"role": "assistant", "content": raw})
+            messages.append({"role": "tool", "content": tool_result_json})
             messages.append({"role": "user", "content": "Continue using the tool result."})
 
         answer = "I could not finish within max_steps. Please refine the goal or increase max_steps."
-        self.history_store.add_message(sid, "assistant", answer)
+        pending_rows.append(("assistant", answer))
+        flush_history()
         timings.update(timer.as_dict())
         yield {
             "event": "final",
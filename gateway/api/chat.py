@@ -1,3 +1,4 @@
+import asyncio
 import json
 import logging
 from typing import Any, Dict, Optional
@@ -29,9 +30,12 @@ class QueryResponse(BaseModel):
 
 
 @router.post("/query", response_model=QueryResponse)
-def query(req: QueryRequest, request: Request):
+async def query(req: QueryRequest, request: Request):
     try:
-        result = request.app.state.container.agent.run(
+        # The agent blocks for seconds on the LLM; run it on a worker thread
+        # so the event loop keeps accepting requests meanwhile.
+        result = await asyncio.to_thread(
+            request.app.state.container.agent.run,
             query=req.query,
             session_id=req.session_id,
             remember=req.remember,
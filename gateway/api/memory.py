@@ -1,3 +1,4 @@
+import asyncio
 from typing import Any, Dict
 
 from fastapi import APIRouter, HTTPException, Request
@@ -29,18 +30,18 @@ class MemorySearchResponse(BaseModel):
 
 
 @router.post("/memory/add", response_model=MemoryAddResponse)
-def add_memory(req: MemoryAddRequest, request: Request) -> MemoryAddResponse:
+async def add_memory(req: MemoryAddRequest, request: Request) -> MemoryAddResponse:
     try:
-        out = request.app.state.container.vector.add_text(req.text, req.meta)
+        out = await asyncio.to_thread(request.app.state.container.vector.add_text, req.text, req.meta)
         return MemoryAddResponse(ok=True, memory_id=str(out["memory_id"]), skipped=out.get("skipped", False), reason=out.get("reason", ""))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/memory/search", response_model=MemorySearchResponse)
-def search_memory(req: MemorySearchRequest, request: Request) -> MemorySearchResponse:
+async def search_memory(req: MemorySearchRequest, request: Request) -> MemorySearchResponse:
     try:
-        hits = request.app.state.container.vector.search_text(req.query, k=req.k)
+        hits = await asyncio.to_thread(request.app.state.container.vector.search_text, req.query, req.k)
         return MemorySearchResponse(ok=True, hits=hits)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
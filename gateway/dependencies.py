@@ -4,10 +4,13 @@ import os
 from core.agent import AgentService
 
 from llm.ollama_client import OllamaChatClient
+from llm.embedding_cache import CachedEmbeddingsClient
 from llm.embeddings_client import OllamaEmbeddingsClient
 from llm.openai_client import OpenAIChatClient, OpenAIEmbeddingsClient
 
 from memory.history_store import HistoryStore
+from memory.semantic_cache import SemanticCache
+from memory.sqlite_vec_store import SqliteVecStore
 from memory.vector_store import VectorStore
 from tools.registry import ToolRegistry
 from tools.vector_add import VectorAddTool
@@ -44,7 +47,7 @@ from scheduler.runner import SchedulerRunner
 class Container:
     agent: AgentService
     history: HistoryStore
-    vector: VectorStore
+    vector: object  # VectorStore or SqliteVecStore
     tools: ToolRegistry
     skills: SkillRegistry
     chat: object  # OllamaChatClient or OpenAIChatClient
@@ -95,7 +98,11 @@ def _build_llm_clients(provider: str):
     ollama_model = os.environ.get("OLLAMA_MODEL", "llama3:latest")
     ollama_timeout = float(os.environ.get("OLLAMA_TIMEOUT", "120"))
     ollama_embed_model = os.environ.get("OLLAMA_EMBED_MODEL", "nomic-embed-text")
-    chat = OllamaChatClient(ollama_url, ollama_model, timeout=ollama_timeout)
+    chat = OllamaChatClient(
+        ollama_url, ollama_model, timeout=ollama_timeout,
+        keep_alive=os.environ.get("OLLAMA_KEEP_ALIVE", "10m"),
+        num_ctx=int(os.environ.get("OLLAMA_NUM_CTX", "4096")),
+    )
     embed = OllamaEmbeddingsClient(ollama_url, ollama_embed_model, timeout=ollama_timeout)
     return chat, embed
 
@@ -112,13 +119,31 @@ def build_container() -> Container:
     provider = os.environ.get("LLM_PROVIDER", "ollama").lower()
     chat, embed = _build_llm_clients(provider)
 
+    if os.environ.get("AGENT_EMBED_CACHE", "true").lower() in ("true", "1", "yes"):
+        embed = CachedEmbeddingsClient(
+            embed,
+            capacity=int(os.environ.get("AGENT_EMBED_CACHE_SIZE", "4096")),
+            ttl_s=float(os.environ.get("AGENT_EMBED_CACHE_TTL", "86400")),
+            db_path=os.path.join(data_dir, "embedding_cache.sqlite3"),
+        )
+
     history = HistoryStore(sqlite_path)
-    vector = VectorStore(
-        persist_dir=vector_dir,
-        collection_name=vector_collection,
-        embeddings_client=embed,
-        dedup_distance=dedup_distance,
-    )
+    vector_backend = os.environ.get("AGENT_VECTOR_BACKEND", "chroma").lower()
+    if vector_backend in ("sqlite-vec", "sqlite_vec", "sqlite"):
+        vector = SqliteVecStore(
+            db_path=os.path.join(data_dir, "vector_memory.sqlite3"),
+            embeddings_client=embed,
+            dedup_distance=dedup_distance,
+        )
+    else:
+        vector = VectorStore(
+            persist_dir=vector_dir,
+            collection_name=vector_collection,
+            embeddings_client=embed,
+            dedup_distance=dedup_distance,
+            hot_cache_size=int(os.environ.get("AGENT_HOT_CACHE_SIZE", "512")),
+            hot_serve_distance=float(os.environ.get("AGENT_HOT_CACHE_DISTANCE", "0.10")),
+        )
 
     tools = ToolRegistry()
     tools.register(VectorAddTool(vector_store=vector))
@@ -195,6 +220,14 @@ def build_container() -> Container:
         check_interval=60,
     )
 
+    semantic_cache = None
+    if os.environ.get("AGENT_SEMANTIC_CACHE", "false").lower() in ("true", "1", "yes"):
+        semantic_cache = SemanticCache(
+            capacity=int(os.environ.get("AGENT_SEMANTIC_CACHE_SIZE", "1000")),
+            ttl_s=float(os.environ.get("AGENT_SEMANTIC_CACHE_TTL", "3600")),
+            threshold=float(os.environ.get("AGENT_SEMANTIC_CACHE_THRESHOLD", "0.95")),
+        )
+
     agent = AgentService(
         history_store=history,
         vector_store=vector,
@@ -203,6 +236,8 @@ def build_container() -> Container:
         skill_registry=skills,
         context_tail=context_tail,
         memory_hits=memory_hits,
+        semantic_cache=semantic_cache,
+        intent_router=os.environ.get("AGENT_INTENT_ROUTER", "true").lower() in ("true", "1", "yes"),
     )
 
     return Container(agent=agent, history=history, vector=vector,
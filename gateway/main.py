@@ -3,6 +3,7 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from gateway.dependencies import build_container
 from gateway.api.chat import router as chat_router
@@ -32,7 +33,8 @@ async def lifespan(app: FastAPI):
 
 container = build_container()
 
-app = FastAPI(title="OmegaGrid Agent Gateway", lifespan=lifespan)
+app = FastAPI(title="OmegaGrid Agent Gateway", lifespan=lifespan,
+              default_response_class=ORJSONResponse)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
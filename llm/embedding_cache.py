@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class CachedEmbeddingsClient:
+    """LRU + TTL cache in front of an embeddings client.
+
+    Every vector search and dedup check pays an Ollama /api/embed round-trip
+    for its text; identical texts (the same query re-asked, re-added memories)
+    are embedded over and over. This wrapper turns repeats into a dict lookup,
+    keyed by sha256(model + text) so switching embed models never serves stale
+    vectors.
+
+    Entries are mirrored to a sqlite sidecar table so restarts start warm:
+    in-memory misses fall back to the sidecar before hitting the network.
+    """
+
+    def __init__(self, inner, capacity: int = 4096, ttl_s: float = 86400.0,
+                 db_path: Optional[str] = None):
+        self.inner = inner
+        self.capacity = capacity
+        self.ttl_s = ttl_s
+        # key -> (embedding, cached_at); order == LRU order
+        self._mem: "OrderedDict[bytes, tuple[List[float], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, key BLOB NOT NULL, vec BLOB NOT NULL, "
+                "created_at REAL NOT NULL, PRIMARY KEY (model, key))"
+            )
+            self._conn.commit()
+
+    @property
+    def model(self) -> str:
+        return self.inner.model
+
+    def _key(self, text: str) -> bytes:
+        return hashlib.sha256((self.model + "\x00" + text).encode("utf-8", errors="ignore")).digest()
+
+    def _get(self, key: bytes, now: float) -> Optional[List[float]]:
+        entry = self._mem.get(key)
+        if entry is not None:
+            vec, cached_at = entry
+            if self.ttl_s <= 0 or now - cached_at < self.ttl_s:
+                self._mem.move_to_end(key)
+                return vec
+            del self._mem[key]
+        if self._conn is not None:
+            row = self._conn.execute(
+                "SELECT vec, created_at FROM embeddings WHERE model = ? AND key = ?",
+                (self.model, key),
+            ).fetchone()
+            if row is not None:
+                if self.ttl_s <= 0 or now - row[1] < self.ttl_s:
+                    vec_arr = array("f")
+                    vec_arr.frombytes(row[0])
+                    vec = list(vec_arr)
+                    self._put_mem(key, vec, now)
+                    return vec
+                self._conn.execute("DELETE FROM embeddings WHERE model = ? AND key = ?", (self.model, key))
+                self._conn.commit()
+        return None
+
+    def _put_mem(self, key: bytes, vec: List[float], now: float) -> None:
+        while len(self._mem) >= self.capacity:
+            self._mem.popitem(last=False)
+        self._mem[key] = (vec, now)
+
+    def _put(self, key: bytes, vec: List[float], now: float) -> None:
+        self._put_mem(key, vec, now)
+        if self._conn is not None:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO embeddings(model, key, vec, created_at) VALUES (?, ?, ?, ?)",
+                    (self.model, key, array("f", vec).tobytes(), now),
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning("Embedding cache sidecar write failed: %s", e)
+
+    def embed(self, text: str) -> Tuple[List[float], float]:
+        t0 = time.perf_counter()
+        key = self._key(text)
+        now = time.time()
+        with self._lock:
+            vec = self._get(key, now)
+        if vec is not None:
+            return vec, (time.perf_counter() - t0)
+        vec, emb_s = self.inner.embed(text)
+        with self._lock:
+            self._put(key, vec, now)
+        return vec, emb_s
+
+    def embed_many(self, texts: List[str]) -> Tuple[List[List[float]], float]:
+        """Embed a batch, issuing one request for all cache misses."""
+        t0 = time.perf_counter()
+        now = time.time()
+        out: List[Optional[List[float]]] = [None] * len(texts)
+        miss_idx: List[int] = []
+        with self._lock:
+            for i, text in enumerate(texts):
+                vec = self._get(self._key(text), now)
+                if vec is not None:
+                    out[i] = vec
+                else:
+                    miss_idx.append(i)
+        if miss_idx:
+            miss_texts = [texts[i] for i in miss_idx]
+            if hasattr(self.inner, "embed_many"):
+                vecs, _ = self.inner.embed_many(miss_texts)
+            else:
+                vecs = [self.inner.embed(t)[0] for t in miss_texts]
+            with self._lock:
+                for i, vec in zip(miss_idx, vecs):
+                    out[i] = vec
+                    self._put(self._key(texts[i]), vec, now)
+        return out, (time.perf_counter() - t0)
@@ -5,6 +5,7 @@ import time
 from typing import List, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +15,13 @@ class OllamaEmbeddingsClient:
         self.base_url = base_url.rstrip("/")
         self.model = model
         self.timeout = timeout
+        # Reuse one pooled keep-alive connection across embed calls instead
+        # of paying a TCP handshake per request.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Connection"] = "keep-alive"
 
     def embed(self, text: str) -> Tuple[List[float], float]:
         t0 = time.perf_counter()
@@ -22,7 +30,7 @@ class OllamaEmbeddingsClient:
 
         # Attempt 1: /api/embed (native Ollama)
         try:
-            r = requests.post(
+            r = self.session.post(
                 f"{base}/api/embed",
                 json={"model": self.model, "input": text},
                 timeout=self.timeout,
@@ -38,7 +46,7 @@ class OllamaEmbeddingsClient:
 
         # Attempt 2: /v1/embeddings (OpenAI-compatible)
         try:
-            r = requests.post(
+            r = self.session.post(
                 f"{base}/v1/embeddings",
                 json={"model": self.model, "input": text},
                 timeout=self.timeout,
@@ -54,7 +62,7 @@ class OllamaEmbeddingsClient:
 
         # Attempt 3: /api/embeddings (legacy)
         try:
-            r = requests.post(
+            r = self.session.post(
                 f"{base}/api/embeddings",
                 json={"model": self.model, "prompt": text},
                 timeout=self.timeout,
@@ -74,3 +82,23 @@ class OllamaEmbeddingsClient:
             f"All embedding endpoints failed (model={self.model}, base={base}). "
             f"Ensure the embedding model is pulled and available. Errors: {detail}"
         )
+
+    def embed_many(self, texts: List[str]) -> Tuple[List[List[float]], float]:
+        """Embed a batch of texts in one /api/embed call (Ollama accepts array
+        input). Falls back to per-text embed() if the batched call fails."""
+        t0 = time.perf_counter()
+        try:
+            r = self.session.post(
+                f"{self.base_url}/api/embed",
+                json={"model": self.model, "input": texts},
+                timeout=self.timeout,
+            )
+            if r.status_code == 200:
+                embs = r.json().get("embeddings")
+                if isinstance(embs, list) and len(embs) == len(texts):
+                    return embs, (time.perf_counter() - t0)
+            logger.warning("Batched /api/embed failed (status=%s), falling back to per-text embed", r.status_code)
+        except requests.exceptions.RequestException as e:
+            logger.warning("Batched /api/embed failed (%s), falling back to per-text embed", e)
+        out = [self.embed(t)[0] for t in texts]
+        return out, (time.perf_counter() - t0)
@@ -1,27 +1,100 @@
 from __future__ import annotations
 
+import json
 import time
 from typing import Dict, List, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+
+
+class _BraceScanner:
+    """Tracks JSON brace depth incrementally across streamed chunks.
+
+    Knows just enough JSON (string literals, backslash escapes) to tell when
+    the top-level object closes, so the stream can stop as soon as the model
+    has produced a complete {...} even if it keeps generating trailing
+    whitespace or tokens afterwards.
+    """
+
+    __slots__ = ("depth", "in_string", "escaped", "opened")
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.opened = False
+
+    def feed(self, chunk: str) -> bool:
+        """Consume a chunk; return True once a balanced object has been seen."""
+        for ch in chunk:
+            if self.escaped:
+                self.escaped = False
+            elif self.in_string:
+                if ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch == "{":
+                self.depth += 1
+                self.opened = True
+            elif ch == "}":
+                self.depth -= 1
+            if self.opened and self.depth == 0:
+                return True
+        return False
 
 
 class OllamaChatClient:
-    def __init__(self, base_url: str, model: str, timeout: float = 120.0):
+    def __init__(self, base_url: str, model: str, timeout: float = 120.0,
+                 keep_alive: str = "10m", num_ctx: int = 4096):
         self.base_url = base_url.rstrip("/")
         self.model = model
         self.timeout = timeout
+        self.keep_alive = keep_alive
+        self.num_ctx = num_ctx
+        # Keep-alive session: the agent loop makes several sequential chat
+        # calls per turn, so reusing one pooled connection avoids a TCP
+        # handshake (and slow-start) per step.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Connection"] = "keep-alive"
 
     def complete_json(self, messages: List[Dict[str, str]]) -> Tuple[str, float]:
         t0 = time.perf_counter()
         payload = {
             "model": self.model,
             "messages": messages,
-            "stream": False,
+            "stream": True,
             "format": "json",
-            "options": {"temperature": 0.2},
+            # keep_alive pins the model (and its KV cache) in memory between
+            # agent steps, so steps 2..N reuse the cached prompt prefix
+            # instead of re-evaluating the shared system prompt every call.
+            "options": {"temperature": 0.2, "num_ctx": self.num_ctx},
+            "keep_alive": self.keep_alive,
         }
-        r = requests.post(f"{self.base_url}/api/chat", json=payload, timeout=self.timeout)
-        r.raise_for_status()
-        data = r.json()
-        return data["message"]["content"], (time.perf_counter() - t0)
+        parts: List[str] = []
+        scanner = _BraceScanner()
+        r = self.session.post(f"{self.base_url}/api/chat", json=payload,
+                              timeout=self.timeout, stream=True)
+        try:
+            r.raise_for_status()
+            for line in r.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                piece = (chunk.get("message") or {}).get("content", "")
+                if piece:
+                    parts.append(piece)
+                    if scanner.feed(piece):
+                        # Balanced top-level object — anything after is noise.
+                        break
+                if chunk.get("done"):
+                    break
+        finally:
+            r.close()
+        return "".join(parts), (time.perf_counter() - t0)
@@ -3,71 +3,153 @@ from __future__ import annotations
 import json
 import os
 import sqlite3
+import threading
 import time
 from typing import Any, Dict, List
 
+try:
+    import orjson
+
+    def _loads(s: str) -> Any:
+        return orjson.loads(s)
+
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+except ImportError:  # stdlib fallback when orjson isn't installed
+    def _loads(s: str) -> Any:
+        return json.loads(s)
+
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
 
 class HistoryStore:
+    _INSERT_MESSAGE_SQL = "INSERT INTO messages(session_id, ts, role, content_json) VALUES (?, ?, ?, ?)"
+    _LOAD_TAIL_SQL = "SELECT role, content_json FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT ?"
+    _BUMP_COUNT_SQL = "UPDATE sessions SET message_count = message_count + ? WHERE id = ?"
+
     def __init__(self, path: str):
         os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
-        self.conn = sqlite3.connect(path, check_same_thread=False)
+        # isolation_level=None puts the driver in autocommit mode: no implicit
+        # BEGIN per DML statement. Multi-statement writes open their own
+        # explicit transactions below.
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
         self.conn.row_factory = sqlite3.Row
+        # WAL lets readers proceed during writes and turns the per-commit
+        # fsync into a cheap WAL append; NORMAL is durable enough for chat
+        # history (a crash can lose at most the last transaction).
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self.conn.execute("PRAGMA mmap_size=268435456")
         self._init_schema()
+        # One long-lived cursor for the hot insert/read paths: sqlite3 keeps
+        # the compiled statement attached to it, so the INSERT/SELECT text is
+        # parsed once instead of per call. The connection is shared across
+        # threads (check_same_thread=False), so access is serialized here.
+        self._cur = self.conn.cursor()
+        self._lock = threading.Lock()
 
     def _init_schema(self) -> None:
         cur = self.conn.cursor()
-        cur.execute("CREATE TABLE IF NOT EXISTS sessions (id INTEGER PRIMARY KEY AUTOINCREMENT, created_at REAL NOT NULL)")
+        cur.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (id INTEGER PRIMARY KEY AUTOINCREMENT, created_at REAL NOT NULL, message_count INTEGER NOT NULL DEFAULT 0)"
+        )
         cur.execute(
             "CREATE TABLE IF NOT EXISTS messages (id INTEGER PRIMARY KEY AUTOINCREMENT, session_id INTEGER NOT NULL, ts REAL NOT NULL, role TEXT NOT NULL, content_json TEXT NOT NULL)"
         )
         cur.execute("CREATE INDEX IF NOT EXISTS idx_messages_session_ts ON messages(session_id, ts)")
-        self.conn.commit()
+        # id is the rowid, so (session_id, id DESC) gives load_tail /
+        # list_messages an index-ordered walk with no sort step.
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_messages_session_id ON messages(session_id, id DESC)")
+        # Migration for databases created before message_count existed:
+        # add the column and backfill it from the messages table once.
+        cols = {r[1] for r in cur.execute("PRAGMA table_info(sessions)").fetchall()}
+        if "message_count" not in cols:
+            cur.execute("ALTER TABLE sessions ADD COLUMN message_count INTEGER NOT NULL DEFAULT 0")
+            cur.execute(
+                "UPDATE sessions SET message_count = "
+                "(SELECT COUNT(1) FROM messages m WHERE m.session_id = sessions.id)"
+            )
 
     def create_session(self) -> int:
-        cur = self.conn.cursor()
-        cur.execute("INSERT INTO sessions(created_at) VALUES (?)", (time.time(),))
-        self.conn.commit()
-        return int(cur.lastrowid)
+        with self._lock:
+            # Single statement — autocommit covers it.
+            self._cur.execute("INSERT INTO sessions(created_at) VALUES (?)", (time.time(),))
+            return int(self._cur.lastrowid)
 
-    def add_message(self, session_id: int, role: str, content: Any) -> None:
-        payload = content if isinstance(content, dict) else {"content": content}
-        cur = self.conn.cursor()
-        cur.execute(
-            "INSERT INTO messages(session_id, ts, role, content_json) VALUES (?, ?, ?, ?)",
-            (session_id, time.time(), role, json.dumps(payload, ensure_ascii=False)),
-        )
-        self.conn.commit()
+    def add_message(self, session_id: int, role: str, content: Any = None,
+                    content_json: str = None) -> None:
+        """Store one message. Pass content_json to reuse an already-serialized
+        payload and skip the encode here (the agent loop serializes tool
+        results once for the LLM feedback message anyway)."""
+        if content_json is None:
+            payload = content if isinstance(content, dict) else {"content": content}
+            content_json = _dumps(payload)
+        with self._lock:
+            self._cur.execute("BEGIN IMMEDIATE")
+            try:
+                self._cur.execute(
+                    self._INSERT_MESSAGE_SQL,
+                    (session_id, time.time(), role, content_json),
+                )
+                self._cur.execute(self._BUMP_COUNT_SQL, (1, session_id))
+                self._cur.execute("COMMIT")
+            except BaseException:
+                self._cur.execute("ROLLBACK")
+                raise
+
+    def add_messages_bulk(self, session_id: int, rows: List[tuple]) -> None:
+        """Insert several (role, content) messages in a single transaction.
+
+        One fsync for the whole batch instead of one per message — the agent
+        loop buffers its tool/assistant rows and flushes them here. A row may
+        be (role, content) or (role, None, content_json) when the payload was
+        already serialized upstream.
+        """
+        if not rows:
+            return
+        now = time.time()
+        params = []
+        for row in rows:
+            if len(row) == 3 and row[2] is not None:
+                role, _, content_json = row
+            else:
+                role, content = row[0], row[1]
+                payload = content if isinstance(content, dict) else {"content": content}
+                content_json = _dumps(payload)
+            params.append((session_id, now, role, content_json))
+        with self._lock:
+            self._cur.execute("BEGIN IMMEDIATE")
+            try:
+                self._cur.executemany(self._INSERT_MESSAGE_SQL, params)
+                self._cur.execute(self._BUMP_COUNT_SQL, (len(params), session_id))
+                self._cur.execute("COMMIT")
+            except BaseException:
+                self._cur.execute("ROLLBACK")
+                raise
 
     def load_tail(self, session_id: int, limit: int = 30) -> List[Dict[str, Any]]:
-        cur = self.conn.cursor()
-        cur.execute(
-            "SELECT role, content_json FROM messages WHERE session_id = ? ORDER BY ts DESC LIMIT ?",
-            (session_id, limit),
-        )
-        rows = list(cur.fetchall())[::-1]
+        with self._lock:
+            self._cur.execute(self._LOAD_TAIL_SQL, (session_id, limit))
+            rows = list(self._cur.fetchall())[::-1]
         out: List[Dict[str, Any]] = []
         for row in rows:
-            payload = json.loads(row["content_json"])
+            payload = _loads(row["content_json"])
             # Skip old raw_model_json debug entries — they pollute LLM context
             if isinstance(payload, dict) and "raw_model_json" in payload:
                 continue
             if isinstance(payload, dict) and "content" in payload and len(payload) == 1:
                 content = payload["content"]
             else:
-                content = json.dumps(payload, ensure_ascii=False)
+                content = _dumps(payload)
             out.append({"role": row["role"], "content": content})
         return out
 
     def list_sessions(self, limit: int = 100) -> List[Dict[str, Any]]:
         cur = self.conn.cursor()
         cur.execute(
-            '''
-            SELECT s.id, s.created_at,
-                   (SELECT COUNT(1) FROM messages m WHERE m.session_id = s.id) AS message_count
-            FROM sessions s
-            ORDER BY s.id DESC
-            LIMIT ?
-            ''',
+            "SELECT id, created_at, message_count FROM sessions ORDER BY id DESC LIMIT ?",
             (limit,),
         )
         return [dict(r) for r in cur.fetchall()]
@@ -75,16 +157,16 @@ class HistoryStore:
     def list_messages(self, session_id: int, limit: int = 200, offset: int = 0) -> List[Dict[str, Any]]:
         cur = self.conn.cursor()
         cur.execute(
-            "SELECT id, session_id, ts, role, content_json FROM messages WHERE session_id = ? ORDER BY ts ASC LIMIT ? OFFSET ?",
+            "SELECT id, session_id, ts, role, content_json FROM messages WHERE session_id = ? ORDER BY id ASC LIMIT ? OFFSET ?",
             (session_id, limit, offset),
         )
         out: List[Dict[str, Any]] = []
         for row in cur.fetchall():
-            payload = json.loads(row["content_json"])
+            payload = _loads(row["content_json"])
             if isinstance(payload, dict) and "content" in payload and len(payload) == 1:
                 content = payload["content"]
             else:
-                content = json.dumps(payload, ensure_ascii=False)
+                content = _dumps(payload)
             out.append({
                 "id": row["id"],
                 "session_id": row["session_id"],
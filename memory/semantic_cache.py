@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+
+from memory.sim_kernels import cosine_sims
+
+
+class SemanticCache:
+    """Bounded LRU cache of (query embedding, answer) pairs.
+
+    Sits in front of the agent loop: when a new query embeds close enough
+    (cosine similarity >= threshold) to a previously answered one, the stored
+    answer is returned immediately and the LLM round-trip is skipped entirely.
+
+    Embeddings are kept stacked in a single float32 matrix so a lookup is one
+    BLAS matrix-vector product instead of a Python loop over rows.
+    """
+
+    def __init__(self, capacity: int = 1000, ttl_s: float = 3600.0, threshold: float = 0.95):
+        self.capacity = capacity
+        self.ttl_s = ttl_s
+        self.threshold = threshold
+        # key -> (embedding, answer, inserted_at); order == LRU order
+        self._entries: "OrderedDict[int, tuple[np.ndarray, str, float]]" = OrderedDict()
+        self._next_key = itertools.count()
+        self._matrix: Optional[np.ndarray] = None
+        self._keys: List[int] = []
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _evict_expired(self, now: float) -> None:
+        if self.ttl_s <= 0:
+            return
+        cutoff = now - self.ttl_s
+        expired = [k for k, (_, _, ts) in self._entries.items() if ts < cutoff]
+        for k in expired:
+            del self._entries[k]
+        if expired:
+            self._dirty = True
+
+    def _rebuild(self) -> None:
+        if not self._entries:
+            self._matrix = None
+            self._keys = []
+        else:
+            self._keys = list(self._entries.keys())
+            self._matrix = np.stack([self._entries[k][0] for k in self._keys])
+        self._dirty = False
+
+    def lookup(self, embedding: List[float]) -> Optional[str]:
+        """Return the cached answer for the nearest entry, or None on miss."""
+        q = np.asarray(embedding, dtype=np.float32)
+        q_norm = float(np.linalg.norm(q))
+        if q_norm == 0.0:
+            return None
+        with self._lock:
+            self._evict_expired(time.time())
+            if self._dirty:
+                self._rebuild()
+            if self._matrix is None:
+                return None
+            sims = cosine_sims(self._matrix, q)
+            best = int(np.argmax(sims))
+            if float(sims[best]) < self.threshold:
+                return None
+            key = self._keys[best]
+            self._entries.move_to_end(key)
+            return self._entries[key][1]
+
+    def insert(self, embedding: List[float], answer: str) -> None:
+        # float16 halves the cache's memory footprint; at a 0.95 similarity
+        # threshold the precision loss is far below the decision margin.
+        emb = np.asarray(embedding, dtype=np.float16)
+        with self._lock:
+            while len(self._entries) >= self.capacity:
+                self._entries.popitem(last=False)
+            self._entries[next(self._next_key)] = (emb, answer, time.time())
+            self._dirty = True
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import logging
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    from numba import njit, prange
+    _HAVE_NUMBA = True
+except ImportError:
+    _HAVE_NUMBA = False
+
+
+def _cosine_sims_np(mat: np.ndarray, q: np.ndarray) -> np.ndarray:
+    # Callers may store matrices as float16 to halve resident memory; upcast
+    # here so the matmul goes through BLAS instead of slow half-float paths.
+    mat = np.asarray(mat, dtype=np.float32)
+    q = np.asarray(q, dtype=np.float32)
+    norms = np.linalg.norm(mat, axis=1)
+    q_norm = np.linalg.norm(q)
+    return (mat @ q) / (norms * q_norm + 1e-12)
+
+
+if _HAVE_NUMBA:
+    @njit(cache=True, parallel=True, fastmath=True)
+    def _cosine_sims_nb(mat, q):  # pragma: no cover - exercised via cosine_sims
+        n, d = mat.shape
+        out = np.empty(n, dtype=np.float32)
+        q_sq = 0.0
+        for j in range(d):
+            q_sq += q[j] * q[j]
+        q_norm = np.sqrt(q_sq)
+        for i in prange(n):
+            dot = 0.0
+            row_sq = 0.0
+            for j in range(d):
+                dot += mat[i, j] * q[j]
+                row_sq += mat[i, j] * mat[i, j]
+            out[i] = dot / (np.sqrt(row_sq) * q_norm + 1e-12)
+        return out
+
+    def cosine_sims(mat: np.ndarray, q: np.ndarray) -> np.ndarray:
+        """Cosine similarity of every row of mat against q (float32)."""
+        return _cosine_sims_nb(np.ascontiguousarray(mat, dtype=np.float32),
+                               np.ascontiguousarray(q, dtype=np.float32))
+
+    def _warm_compile() -> None:
+        # First call pays LLVM compilation (~1s); trigger it off the request
+        # path so the first real lookup doesn't stall.
+        try:
+            cosine_sims(np.ones((2, 4), dtype=np.float32), np.ones(4, dtype=np.float32))
+        except Exception as e:
+            logger.warning("Numba cosine kernel warm-up failed: %s", e)
+
+    threading.Thread(target=_warm_compile, name="sim-kernels-warmup", daemon=True).start()
+else:
+    cosine_sims = _cosine_sims_np
+
+
+def top_k_cosine(mat: np.ndarray, q: np.ndarray, k: int):
+    """Return (indices, sims) of the k most similar rows, best first."""
+    sims = cosine_sims(mat, q)
+    k = min(k, sims.shape[0])
+    idx = np.argpartition(-sims, k - 1)[:k]
+    idx = idx[np.argsort(-sims[idx])]
+    return idx, sims[idx]
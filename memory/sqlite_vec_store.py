@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+import uuid
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from memory.sim_kernels import top_k_cosine
+from memory.text_dedup import RecentTextIndex
+
+logger = logging.getLogger(__name__)
+
+
+def _load_vec_extension(conn: sqlite3.Connection) -> bool:
+    """Try to make the sqlite-vec vec0 virtual table available."""
+    try:
+        import sqlite_vec
+        # sqlite_vec.load() is just conn.load_extension(loadable_path()),
+        # which sqlite3 refuses ("not authorized") unless extension loading
+        # is enabled on the connection first.
+        conn.enable_load_extension(True)
+        try:
+            sqlite_vec.load(conn)
+        finally:
+            conn.enable_load_extension(False)
+        return True
+    except ImportError:
+        pass
+    except Exception as e:
+        logger.warning("sqlite_vec.load failed: %s", e)
+    try:
+        conn.enable_load_extension(True)
+        conn.load_extension("vec0")
+        conn.enable_load_extension(False)
+        return True
+    except (AttributeError, sqlite3.OperationalError) as e:
+        logger.info("vec0 extension unavailable, using brute-force scan: %s", e)
+        return False
+
+
+class SqliteVecStore:
+    """Vector memory co-located with sqlite via the sqlite-vec vec0 table.
+
+    Drop-in alternative to the Chroma-backed VectorStore for small/medium
+    collections: embeddings live next to the memory rows in one sqlite file
+    (simpler backups, no second store process) and KNN queries go through the
+    vec0 index. When the extension is not installed, search falls back to a
+    brute-force NumPy cosine scan over an in-process matrix, which is still
+    fast for a few thousand memories.
+
+    Select with AGENT_VECTOR_BACKEND=sqlite-vec.
+    """
+
+    def __init__(self, db_path: str, embeddings_client, dedup_distance: float = 0.08,
+                 dim: Optional[int] = None):
+        self.embeddings_client = embeddings_client
+        self.dedup_distance = dedup_distance
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._dim_cache_path = os.path.join(os.path.dirname(db_path) or ".", "ollama_dims.json")
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._vec_enabled = _load_vec_extension(self.conn)
+        self.dim = dim
+        self._init_schema()
+        # Brute-force fallback scans this cached matrix; rebuilt after adds.
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_ids: List[str] = []
+        self._recent_texts = RecentTextIndex()
+
+    def _init_schema(self) -> None:
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS memories ("
+            "rowid INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT NOT NULL UNIQUE, "
+            "text TEXT NOT NULL, meta_json TEXT NOT NULL, hash TEXT NOT NULL, "
+            "embedding BLOB NOT NULL, created_at REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_memories_hash ON memories(hash)")
+        self.conn.commit()
+        if self._vec_enabled:
+            if self.dim is None:
+                self.dim = self._discover_dim()
+            self.conn.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS vec_memories "
+                f"USING vec0(embedding FLOAT[{self.dim}] distance_metric=cosine)"
+            )
+            self.conn.commit()
+
+    def _discover_dim(self) -> int:
+        """Determine the embedding dimension, needed to declare the vec0 table.
+
+        Probing costs an embed round-trip on cold start, so the discovered
+        value is cached in a sidecar JSON file keyed by model name — switching
+        OLLAMA_EMBED_MODEL naturally misses the old key and re-probes.
+        """
+        row = self.conn.execute("SELECT embedding FROM memories LIMIT 1").fetchone()
+        if row is not None:
+            return len(row["embedding"]) // 4
+
+        model = getattr(self.embeddings_client, "model", "")
+        dims: Dict[str, int] = {}
+        if os.path.exists(self._dim_cache_path):
+            try:
+                with open(self._dim_cache_path, "r", encoding="utf-8") as f:
+                    dims = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning("Could not read dimension cache: %s", e)
+        if model and isinstance(dims.get(model), int):
+            return dims[model]
+
+        emb, _ = self.embeddings_client.embed("dimension probe")
+        if model:
+            dims[model] = len(emb)
+            try:
+                fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self._dim_cache_path), suffix=".tmp")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(dims, f)
+                os.replace(tmp, self._dim_cache_path)
+            except OSError as e:
+                logger.warning("Could not write dimension cache: %s", e)
+        return len(emb)
+
+    @staticmethod
+    def _hash_text(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8", errors="ignore")).hexdigest()
+
+    @staticmethod
+    def _to_blob(emb: List[float]) -> bytes:
+        return array("f", emb).tobytes()
+
+    def _invalidate_matrix(self) -> None:
+        self._matrix = None
+        self._matrix_ids = []
+
+    def _nearest(self, emb: List[float], k: int) -> List[Tuple[str, str, str, float]]:
+        """Return up to k (id, text, meta_json, cosine_distance) tuples."""
+        if self._vec_enabled:
+            rows = self.conn.execute(
+                "SELECT m.id, m.text, m.meta_json, v.distance "
+                "FROM vec_memories v JOIN memories m ON m.rowid = v.rowid "
+                "WHERE v.embedding MATCH ? AND k = ? ORDER BY v.distance",
+                (self._to_blob(emb), k),
+            ).fetchall()
+            return [(r["id"], r["text"], r["meta_json"], float(r["distance"])) for r in rows]
+
+        if self._matrix is None:
+            rows = self.conn.execute("SELECT id, embedding FROM memories ORDER BY rowid").fetchall()
+            self._matrix_ids = [r["id"] for r in rows]
+            if rows:
+                # float16 in memory: the brute-force scan is bandwidth-bound.
+                self._matrix = np.stack(
+                    [np.frombuffer(r["embedding"], dtype=np.float32) for r in rows]
+                ).astype(np.float16)
+            else:
+                self._matrix = np.empty((0, len(emb)), dtype=np.float16)
+        if self._matrix.shape[0] == 0:
+            return []
+        q = np.asarray(emb, dtype=np.float32)
+        order, sims = top_k_cosine(self._matrix, q, k)
+        out: List[Tuple[str, str, str, float]] = []
+        for i, sim in zip(order, sims):
+            row = self.conn.execute(
+                "SELECT text, meta_json FROM memories WHERE id = ?", (self._matrix_ids[int(i)],)
+            ).fetchone()
+            out.append((self._matrix_ids[int(i)], row["text"], row["meta_json"], float(1.0 - sim)))
+        return out
+
+    def embed_text(self, text: str) -> Tuple[List[float], float]:
+        """Embed a single text, returning (embedding, elapsed_seconds)."""
+        return self.embeddings_client.embed(text)
+
+    def add_text(self, text: str, meta: Optional[Dict[str, Any]] = None,
+                 memory_id: Optional[str] = None) -> Dict[str, Any]:
+        timings: Dict[str, float] = {}
+        text = (text or "").strip()
+        if not text:
+            raise ValueError("text is empty")
+
+        h = self._hash_text(text)
+        mid = memory_id or str(uuid.uuid4())
+        meta = dict(meta or {})
+        meta.setdefault("created_at", time.time())
+        meta["hash"] = h
+
+        t0 = time.perf_counter()
+        existing = self.conn.execute("SELECT id FROM memories WHERE hash = ?", (h,)).fetchone()
+        timings["sqlite_get_s"] = time.perf_counter() - t0
+        if existing is not None:
+            return {
+                "memory_id": existing["id"],
+                "skipped": True,
+                "reason": "exact_hash_duplicate",
+                "timings": timings,
+            }
+
+        # Near-identical to a recently added text (typo-level edit): reuse the
+        # existing memory instead of embedding + inserting again.
+        fuzzy_id = self._recent_texts.find_near_duplicate(text)
+        if fuzzy_id is not None:
+            return {
+                "memory_id": fuzzy_id,
+                "skipped": True,
+                "reason": "fuzzy_duplicate",
+                "timings": timings,
+            }
+
+        emb, emb_s = self.embeddings_client.embed(text)
+        timings["ollama_embed_s"] = emb_s
+
+        t1 = time.perf_counter()
+        nearest = self._nearest(emb, k=1)
+        timings["sqlite_vec_query_s"] = time.perf_counter() - t1
+
+        nearest_dist = None
+        if nearest:
+            nearest_dist = nearest[0][3]
+            if nearest_dist <= self.dedup_distance:
+                return {
+                    "memory_id": nearest[0][0],
+                    "skipped": True,
+                    "reason": "semantic_duplicate",
+                    "nearest_distance": nearest_dist,
+                    "timings": timings,
+                }
+
+        t2 = time.perf_counter()
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO memories(id, text, meta_json, hash, embedding, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (mid, text, json.dumps(meta, ensure_ascii=False), h, self._to_blob(emb), time.time()),
+            )
+            if self._vec_enabled:
+                self.conn.execute(
+                    "INSERT INTO vec_memories(rowid, embedding) VALUES (?, ?)",
+                    (cur.lastrowid, self._to_blob(emb)),
+                )
+        self._invalidate_matrix()
+        self._recent_texts.remember(text, mid)
+        timings["sqlite_add_s"] = time.perf_counter() - t2
+
+        return {
+            "memory_id": mid,
+            "skipped": False,
+            "reason": "",
+            "nearest_distance": nearest_dist,
+            "timings": timings,
+        }
+
+    def search_text(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+        hits, _ = self.search_with_timings(query, k=k)
+        return hits
+
+    def search_with_timings(self, query: str, k: int = 5,
+                            query_embedding: Optional[List[float]] = None) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+        timings: Dict[str, float] = {}
+        query = (query or "").strip()
+        if not query:
+            return [], timings
+
+        t0 = time.perf_counter()
+        if query_embedding is not None:
+            emb, emb_s = query_embedding, 0.0
+        else:
+            emb, emb_s = self.embeddings_client.embed(query)
+        timings["ollama_embed_s"] = emb_s
+
+        t1 = time.perf_counter()
+        nearest = self._nearest(emb, k=max(1, int(k)))
+        timings["sqlite_vec_query_s"] = time.perf_counter() - t1
+        timings["vector_search_total_s"] = time.perf_counter() - t0
+
+        hits: List[Dict[str, Any]] = []
+        for mid, text, meta_json, dist in nearest:
+            hits.append({
+                "id": mid,
+                "text": text,
+                "metadata": json.loads(meta_json),
+                "distance": dist,
+            })
+        return hits, timings
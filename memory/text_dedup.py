@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import difflib
+import re
+import string
+from collections import OrderedDict
+from typing import Optional
+
+_WS_RE = re.compile(r"\s+")
+_PUNCT_TABLE = str.maketrans("", "", string.punctuation)
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace for fuzzy compare."""
+    return _WS_RE.sub(" ", text.lower().translate(_PUNCT_TABLE)).strip()
+
+
+class RecentTextIndex:
+    """LRU of recently added memory texts for fuzzy-duplicate detection.
+
+    A minor edit to a just-stored memory (typo fix, punctuation) should not
+    trigger a fresh embed + insert. Before embedding, new texts are compared
+    against the last K normalized texts with difflib; a ratio above the
+    threshold reuses the existing memory id and skips the embed RPC entirely.
+    """
+
+    def __init__(self, capacity: int = 32, threshold: float = 0.95):
+        self.capacity = capacity
+        self.threshold = threshold
+        self._recent: "OrderedDict[str, str]" = OrderedDict()  # norm_text -> memory_id
+
+    def find_near_duplicate(self, text: str) -> Optional[str]:
+        """Return the memory_id of a near-identical recent text, else None."""
+        norm = normalize_text(text)
+        if not norm:
+            return None
+        matcher = difflib.SequenceMatcher(autojunk=False)
+        matcher.set_seq2(norm)
+        for prev_norm, memory_id in self._recent.items():
+            matcher.set_seq1(prev_norm)
+            # Cheap upper bounds first; real_quick_ratio is O(1).
+            if matcher.real_quick_ratio() < self.threshold:
+                continue
+            if matcher.quick_ratio() < self.threshold:
+                continue
+            if matcher.ratio() >= self.threshold:
+                self._recent.move_to_end(prev_norm)
+                return memory_id
+        return None
+
+    def remember(self, text: str, memory_id: str) -> None:
+        norm = normalize_text(text)
+        if not norm:
+            return
+        while len(self._recent) >= self.capacity:
+            self._recent.popitem(last=False)
+        self._recent[norm] = memory_id
@@ -2,17 +2,114 @@ from __future__ import annotations
 
 import hashlib
 import json
+import logging
 import os
+import tempfile
 import time
 import uuid
+from collections import Counter
 from typing import Any, Dict, List, Optional, Tuple
 
 import chromadb
+import numpy as np
 from chromadb.config import Settings
 
+from memory.sim_kernels import top_k_cosine
+from memory.text_dedup import RecentTextIndex
+
+logger = logging.getLogger(__name__)
+
+
+class _HotSet:
+    """In-process cache of the most frequently hit memory vectors.
+
+    Every search records which ids it returned; the top-K ids by hit count
+    are kept resident as a NumPy matrix (warmed from the collection at
+    startup). A query whose nearest hot vector is within serve_distance is
+    answered straight from this matrix, skipping the Chroma index walk.
+    Hit counts persist to a sidecar JSON file so restarts warm up hot.
+    """
+
+    _PERSIST_EVERY = 32
+
+    def __init__(self, col, persist_dir: str, capacity: int = 512, serve_distance: float = 0.10):
+        self.col = col
+        self.capacity = capacity
+        self.serve_distance = serve_distance
+        self._counts_path = os.path.join(persist_dir, "hot_ids.json")
+        self._hits: Counter = Counter()
+        self._since_persist = 0
+        self._matrix: Optional[np.ndarray] = None
+        self._ids: List[str] = []
+        self._docs: List[str] = []
+        self._metas: List[Dict[str, Any]] = []
+        if os.path.exists(self._counts_path):
+            try:
+                with open(self._counts_path, "r", encoding="utf-8") as f:
+                    self._hits = Counter(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.warning("Could not load hot-id counts: %s", e)
+        self.warm()
+
+    def warm(self) -> None:
+        """Pre-fetch the top-K hot vectors into the resident matrix."""
+        top = [mid for mid, _ in self._hits.most_common(self.capacity)]
+        if not top:
+            return
+        try:
+            got = self.col.get(ids=top, include=["embeddings", "documents", "metadatas"])
+        except Exception as e:
+            logger.warning("Hot-set warm fetch failed: %s", e)
+            return
+        ids = got.get("ids") or []
+        embs = got.get("embeddings")
+        if not ids or embs is None or len(embs) == 0:
+            return
+        self._ids = list(ids)
+        self._docs = list(got.get("documents") or [])
+        self._metas = list(got.get("metadatas") or [])
+        mat = np.asarray(embs, dtype=np.float32)
+        mat = mat / (np.linalg.norm(mat, axis=1, keepdims=True) + 1e-12)
+        # Stored as float16: the scan is memory-bandwidth-bound, so halving
+        # bytes per row roughly doubles effective throughput.
+        self._matrix = mat.astype(np.float16)
+
+    def record(self, ids: List[str]) -> None:
+        self._hits.update(ids)
+        self._since_persist += 1
+        if self._since_persist >= self._PERSIST_EVERY:
+            self._since_persist = 0
+            try:
+                fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self._counts_path), suffix=".tmp")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(dict(self._hits.most_common(self.capacity * 4)), f)
+                os.replace(tmp, self._counts_path)
+            except OSError as e:
+                logger.warning("Could not persist hot-id counts: %s", e)
+
+    def try_search(self, emb: List[float], k: int) -> Optional[List[Dict[str, Any]]]:
+        """Answer from the hot set, or None when it can't do so safely."""
+        if self._matrix is None or self._matrix.shape[0] < k:
+            return None
+        q = np.asarray(emb, dtype=np.float32)
+        order, sims = top_k_cosine(self._matrix, q, k)
+        if 1.0 - float(sims[0]) > self.serve_distance:
+            return None
+        hits: List[Dict[str, Any]] = []
+        for i, sim in zip(order, sims):
+            i = int(i)
+            hits.append({
+                "id": self._ids[i],
+                "text": self._docs[i] if i < len(self._docs) else "",
+                "metadata": self._metas[i] if i < len(self._metas) else {},
+                "distance": float(1.0 - sim),
+            })
+        return hits
+
 
 class VectorStore:
-    def __init__(self, persist_dir: str, collection_name: str, embeddings_client, dedup_distance: float = 0.08):
+    def __init__(self, persist_dir: str, collection_name: str, embeddings_client, dedup_distance: float = 0.08,
+                 hot_cache_size: int = 512, hot_serve_distance: float = 0.10):
         self.persist_dir = persist_dir
         self.collection_name = collection_name
         self.embeddings_client = embeddings_client
@@ -27,6 +124,9 @@ class VectorStore:
             name=self.collection_name,
             metadata={"hnsw:space": "cosine"},
         )
+        self.hot = _HotSet(self.col, self.persist_dir, capacity=hot_cache_size,
+                           serve_distance=hot_serve_distance) if hot_cache_size > 0 else None
+        self._recent_texts = RecentTextIndex()
 
     @staticmethod
     def _hash_text(text: str) -> str:
@@ -66,6 +166,17 @@ class VectorStore:
                 "timings": timings,
             }
 
+        # Fuzzy pre-check against recently added texts: a typo-level edit of
+        # a fresh memory should not cost an embed RPC + index insert.
+        fuzzy_id = self._recent_texts.find_near_duplicate(text)
+        if fuzzy_id is not None:
+            return {
+                "memory_id": fuzzy_id,
+                "skipped": True,
+                "reason": "fuzzy_duplicate",
+                "timings": timings,
+            }
+
         emb, emb_s = self.embeddings_client.embed(text)
         timings["ollama_embed_s"] = emb_s
 
@@ -88,6 +199,7 @@ class VectorStore:
         t2 = time.perf_counter()
         self.col.add(ids=[mid], documents=[text], embeddings=[emb], metadatas=[safe_meta])
         timings["chroma_add_s"] = time.perf_counter() - t2
+        self._recent_texts.remember(text, mid)
 
         return {
             "memory_id": mid,
@@ -97,20 +209,42 @@ class VectorStore:
             "timings": timings,
         }
 
+    def embed_text(self, text: str) -> Tuple[List[float], float]:
+        """Embed a single text, returning (embedding, elapsed_seconds)."""
+        return self.embeddings_client.embed(text)
+
     def search_text(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
         hits, _ = self.search_with_timings(query, k=k)
         return hits
 
-    def search_with_timings(self, query: str, k: int = 5) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+    def search_with_timings(self, query: str, k: int = 5,
+                            query_embedding: Optional[List[float]] = None) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+        """Search for k nearest memories.
+
+        Pass query_embedding to reuse an embedding computed upstream (e.g. by
+        the semantic answer cache) and skip the Ollama embed round-trip.
+        """
         timings: Dict[str, float] = {}
         query = (query or "").strip()
         if not query:
             return [], timings
 
         t0 = time.perf_counter()
-        emb, emb_s = self.embeddings_client.embed(query)
+        if query_embedding is not None:
+            emb, emb_s = query_embedding, 0.0
+        else:
+            emb, emb_s = self.embeddings_client.embed(query)
         timings["ollama_embed_s"] = emb_s
 
+        if self.hot is not None:
+            t1 = time.perf_counter()
+            hot_hits = self.hot.try_search(emb, k=max(1, int(k)))
+            if hot_hits is not None:
+                timings["hot_cache_query_s"] = time.perf_counter() - t1
+                timings["vector_search_total_s"] = time.perf_counter() - t0
+                self.hot.record([h["id"] for h in hot_hits])
+                return hot_hits, timings
+
         t1 = time.perf_counter()
         res = self.col.query(
             query_embeddings=[emb],
@@ -133,4 +267,6 @@ class VectorStore:
                 "metadata": meta,
                 "distance": float(dist),
             })
+        if self.hot is not None and ids:
+            self.hot.record(list(ids))
         return hits, timings
@@ -7,7 +7,7 @@ import json
 
 import pytest
 
-from core.agent import _normalize_tool_call, _parse_json_safely
+from core.agent import _normalize_tool_call, _parse_json_safely, _route_intent
 
 
 class TestParseJsonSafely:
@@ -29,6 +29,18 @@ class TestParseJsonSafely:
         out = _parse_json_safely(text)
         assert out["type"] == "final"
 
+    def test_brace_in_string_value(self):
+        """A '}' inside a quoted value must not end the extraction early."""
+        text = 'Sure: {"type": "final", "answer": "use {} or dict()"} done'
+        out = _parse_json_safely(text)
+        assert out["answer"] == "use {} or dict()"
+
+    def test_stray_brace_after_json(self):
+        """Prose after the JSON containing '}' used to break the greedy regex."""
+        text = '{"type": "final", "answer": "hi"} (note: wrap args in {...})'
+        out = _parse_json_safely(text)
+        assert out == {"type": "final", "answer": "hi"}
+
     def test_no_json_at_all_raises(self):
         with pytest.raises(ValueError):
             _parse_json_safely("just plain text, no braces")
@@ -125,3 +137,35 @@ class TestNormalizeToolCall:
         # Unknown tool — should not auto-recover
         out = _normalize_tool_call(data, self.tools)
         assert out.get("type") != "tool_call" or out.get("tool") != "nonexistent_tool" or "type" not in out
+
+
+class TestRouteIntent:
+    def test_remember(self):
+        assert _route_intent("remember that my favorite editor is vim") == \
+            ("vector_add", "my favorite editor is vim")
+
+    def test_remember_without_that(self):
+        assert _route_intent("Remember the deploy window is Friday") == \
+            ("vector_add", "the deploy window is Friday")
+
+    def test_what_do_you_know(self):
+        assert _route_intent("What do you know about the staging cluster?") == \
+            ("vector_search", "the staging cluster")
+
+    def test_what_did_i_say(self):
+        assert _route_intent("what did I tell you about backups?") == \
+            ("vector_search", "backups")
+
+    def test_search_memory_for(self):
+        assert _route_intent("search memory for database credentials") == \
+            ("vector_search", "database credentials")
+
+    def test_general_question_not_routed(self):
+        assert _route_intent("what's the weather in Paris?") is None
+
+    def test_remember_embedded_in_sentence_not_routed(self):
+        """'remember' must lead the query — mid-sentence mentions go to the LLM."""
+        assert _route_intent("I can't remember where I put my keys") is None
+
+    def test_empty_query(self):
+        assert _route_intent("") is None
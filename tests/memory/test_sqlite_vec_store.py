@@ -0,0 +1,153 @@
+"""Tests for the sqlite-vec backed vector store.
+
+Runs against whatever backend engages on this machine (vec0 extension if
+sqlite-vec is installed, brute-force NumPy scan otherwise) plus an
+explicitly forced brute-force store, so both code paths stay covered. A
+fake embeddings client keeps everything offline.
+"""
+import json
+import random
+import sqlite3
+
+import pytest
+
+import memory.sqlite_vec_store as svs
+from memory.sqlite_vec_store import SqliteVecStore
+
+DIM = 8
+
+
+class FakeEmbeddingsClient:
+    """Deterministic per-text unit vectors, with optional overrides."""
+    model = "fake-embed"
+
+    def __init__(self):
+        self.calls = 0
+        self.overrides = {}
+
+    def embed(self, text):
+        self.calls += 1
+        if text in self.overrides:
+            return list(self.overrides[text]), 0.0
+        rng = random.Random(text)
+        vec = [rng.uniform(-1, 1) for _ in range(DIM)]
+        norm = sum(v * v for v in vec) ** 0.5
+        return [v / norm for v in vec], 0.0
+
+
+@pytest.fixture
+def client():
+    return FakeEmbeddingsClient()
+
+
+@pytest.fixture
+def store(tmp_path, client):
+    return SqliteVecStore(str(tmp_path / "vec.sqlite3"), client, dim=DIM)
+
+
+@pytest.fixture
+def brute_store(tmp_path, client, monkeypatch):
+    """Store with the vec0 extension forced off — exercises the NumPy scan."""
+    monkeypatch.setattr(svs, "_load_vec_extension", lambda conn: False)
+    return SqliteVecStore(str(tmp_path / "brute.sqlite3"), client, dim=DIM)
+
+
+class TestExtensionLoading:
+    def test_vec_enabled_is_bool(self, store):
+        assert isinstance(store._vec_enabled, bool)
+
+    def test_vec_table_exists_when_enabled(self, store):
+        tables = {r["name"] for r in store.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")}
+        assert ("vec_memories" in tables) == store._vec_enabled
+
+    def test_extension_actually_loads_when_installed(self, store):
+        pytest.importorskip("sqlite_vec")
+        if not hasattr(sqlite3.Connection, "enable_load_extension"):
+            pytest.skip("sqlite3 built without loadable-extension support")
+        assert store._vec_enabled
+
+
+class TestAddText:
+    def test_empty_text_raises(self, store):
+        with pytest.raises(ValueError):
+            store.add_text("   ")
+
+    def test_add_and_exact_duplicate(self, store):
+        first = store.add_text("the staging cluster runs on three nodes")
+        assert first["skipped"] is False
+        again = store.add_text("the staging cluster runs on three nodes")
+        assert again["skipped"] is True
+        assert again["reason"] == "exact_hash_duplicate"
+        assert again["memory_id"] == first["memory_id"]
+
+    def test_fuzzy_duplicate_skips_embed(self, store, client):
+        first = store.add_text("the production database backup runs every night at 2am")
+        calls_before = client.calls
+        dup = store.add_text("the production database backup runs every night at 3am")
+        assert dup["skipped"] is True
+        assert dup["reason"] == "fuzzy_duplicate"
+        assert dup["memory_id"] == first["memory_id"]
+        assert client.calls == calls_before
+
+    def test_semantic_duplicate(self, store, client):
+        client.overrides["alpha text about deploys"] = [1.0] + [0.0] * (DIM - 1)
+        client.overrides["totally different wording here"] = [1.0] + [0.0] * (DIM - 1)
+        first = store.add_text("alpha text about deploys")
+        dup = store.add_text("totally different wording here")
+        assert dup["skipped"] is True
+        assert dup["reason"] == "semantic_duplicate"
+        assert dup["memory_id"] == first["memory_id"]
+
+
+def _basis(i):
+    vec = [0.0] * DIM
+    vec[i] = 1.0
+    return vec
+
+
+class TestSearch:
+    @pytest.fixture(params=["default", "brute"])
+    def any_store(self, request, store, brute_store):
+        return store if request.param == "default" else brute_store
+
+    def test_nearest_first(self, any_store, client):
+        for i, text in enumerate(["about alpha", "about beta", "about gamma"]):
+            client.overrides[text] = _basis(i)
+            any_store.add_text(text, meta={"i": i})
+        hits, timings = any_store.search_with_timings("q", k=2, query_embedding=_basis(1))
+        assert len(hits) == 2
+        assert hits[0]["text"] == "about beta"
+        assert hits[0]["distance"] == pytest.approx(0.0, abs=1e-3)
+        assert hits[0]["metadata"]["i"] == 1
+        assert "sqlite_vec_query_s" in timings
+
+    def test_query_embedding_bypasses_embed(self, any_store, client):
+        any_store.add_text("some memory text")
+        calls_before = client.calls
+        any_store.search_with_timings("query", k=1, query_embedding=_basis(0))
+        assert client.calls == calls_before
+
+    def test_empty_query(self, any_store):
+        hits, _ = any_store.search_with_timings("   ")
+        assert hits == []
+
+
+class TestDiscoverDim:
+    def test_probe_cached_on_disk(self, tmp_path, client):
+        store = SqliteVecStore(str(tmp_path / "a.sqlite3"), client, dim=DIM)
+        assert store._discover_dim() == DIM
+        assert client.calls == 1
+        cache = json.load(open(tmp_path / "ollama_dims.json"))
+        assert cache == {"fake-embed": DIM}
+
+        second = FakeEmbeddingsClient()
+        store2 = SqliteVecStore(str(tmp_path / "b.sqlite3"), second, dim=DIM)
+        assert store2._discover_dim() == DIM
+        assert second.calls == 0
+
+    def test_corrupt_cache_degrades_to_probe(self, tmp_path, client):
+        (tmp_path / "ollama_dims.json").write_text("not json")
+        store = SqliteVecStore(str(tmp_path / "a.sqlite3"), client, dim=DIM)
+        assert store._discover_dim() == DIM
+        assert client.calls == 1
@@ -0,0 +1,57 @@
+"""Tests for the fuzzy-duplicate text index used by the vector stores.
+
+The index decides whether a new memory text skips the embed RPC entirely,
+so both false positives (dropping genuinely new memories) and false
+negatives (re-embedding typo fixes) are bugs worth pinning.
+"""
+from memory.text_dedup import RecentTextIndex, normalize_text
+
+
+class TestNormalizeText:
+    def test_lowercase_and_punctuation(self):
+        assert normalize_text("Hello, World!") == "hello world"
+
+    def test_whitespace_collapsed(self):
+        assert normalize_text("  a\t b \n c ") == "a b c"
+
+    def test_empty(self):
+        assert normalize_text("...") == ""
+
+
+class TestRecentTextIndex:
+    def setup_method(self):
+        self.index = RecentTextIndex(capacity=4, threshold=0.95)
+
+    def test_exact_repeat_found(self):
+        self.index.remember("the deploy window is Friday at noon", "m1")
+        assert self.index.find_near_duplicate("the deploy window is Friday at noon") == "m1"
+
+    def test_typo_level_edit_found(self):
+        self.index.remember("the production database backup runs every night at 2am", "m1")
+        assert self.index.find_near_duplicate(
+            "the production database backup runs every night at 3am") == "m1"
+
+    def test_punctuation_and_case_ignored(self):
+        self.index.remember("My favorite editor is vim", "m1")
+        assert self.index.find_near_duplicate("my favorite editor is vim!") == "m1"
+
+    def test_different_text_not_matched(self):
+        self.index.remember("the deploy window is Friday at noon", "m1")
+        assert self.index.find_near_duplicate("backups are stored in the s3 bucket") is None
+
+    def test_empty_text_not_matched(self):
+        self.index.remember("something", "m1")
+        assert self.index.find_near_duplicate("   ") is None
+
+    def test_capacity_evicts_oldest(self):
+        texts = [
+            "the deploy window is Friday at noon",
+            "backups are stored in the s3 bucket",
+            "the staging cluster runs on three nodes",
+            "grafana lives behind the internal vpn",
+            "rotate the api keys every ninety days",
+        ]
+        for i, text in enumerate(texts):
+            self.index.remember(text, f"m{i}")
+        assert self.index.find_near_duplicate(texts[0]) is None
+        assert self.index.find_near_duplicate(texts[4]) == "m4"